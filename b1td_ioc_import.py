@@ -16,7 +16,7 @@
 
  Author: Chris Marrison
 
- Date Last Updated: 20240829
+ Date Last Updated: 20261019
 
 Copyright 2022 Chris Marrison / Infoblox
 
@@ -46,7 +46,7 @@ POSSIBILITY OF SUCH DAMAGE.
 
 ------------------------------------------------------------------------
 """
-__version__ = '0.0.4'
+__version__ = '0.0.5'
 __author__ = 'Chris Marrison'
 __author_email__ = 'chris@infoblox.com'
 
@@ -55,20 +55,35 @@ import bloxone
 import json
 import csv
 import os
+import io
+import gzip
+import bz2
+import lzma
+import contextlib
 import shutil
 import argparse
+import concurrent.futures
 from importlib.metadata import version
 from packaging.version import Version, parse
 
 # ** Global Variables **
 log = logging.getLogger(__name__)
 
+# Input read buffer size in bytes
+READ_BUFFER = 1024 * 1024
+
+# Magic bytes for supported compressed input formats
+COMPRESSION = { b'\x1f\x8b': gzip,
+                b'\xfd7zXZ\x00': lzma,
+                **{ b'BZh%d' % n: bz2 for n in range(1, 10) } }
+
 # Classes
 
 class IOCReader():
     '''
     Read an input file in CSV or JSON format and make available as 
-    object property self.iocs
+    object property self.iocs, gzip, bzip2 and xz compressed files
+    are decompressed as they are read
     '''
     def __init__(self,
                  filename:str,
@@ -80,6 +95,7 @@ class IOCReader():
         self.filename = filename
         self.datafield:str = datafield
         self.ioc_field:str = iocfield
+        self.compression:str = ''
         self.iocs:list = []
 
         self.read_file()
@@ -94,22 +110,30 @@ class IOCReader():
         status = False
         data: list = []
         
-        with open(self.filename) as f:
-            try:
-                data = json.load(f)
-                log.info('Loaded JSON data')
-                if self.datafield:
-                    log.debug(f'Using datafield: {self.datafield}')
-                    data = self.normalise_json(data)
-            except json.decoder.JSONDecodeError:
-                log.info('Reading CSV format')
-                with open(self.filename, newline='') as f:
-                    data = []
-                    c = csv.DictReader(f)
-                    for row in c:
-                        data.append(row)
-            except:
-                raise
+        try:
+            with self.open_input() as stream:
+                # Determine format from first non-whitespace character
+                json_data = stream.peek(READ_BUFFER).lstrip()[:1] in [b'{', b'[']
+                with io.TextIOWrapper(stream, newline='') as f:
+                    if json_data:
+                        data = json.load(f)
+                        log.info('Loaded JSON data')
+                        if self.datafield:
+                            log.debug(f'Using datafield: {self.datafield}')
+                            data = self.normalise_json(data)
+                    else:
+                        log.info('Reading CSV format')
+                        c = csv.DictReader(f)
+                        for row in c:
+                            data.append(row)
+        except json.decoder.JSONDecodeError as err:
+            log.error(f'Invalid JSON in {self.filename}: {err}')
+            data = []
+        except (EOFError, OSError, lzma.LZMAError) as err:
+            log.error(f'Failed to read {self.compression or "uncompressed"} ' +
+                      f'input {self.filename}: {err}')
+            data = []
+
         if data:
             self.iocs = self.field_map(data)
             status = True
@@ -117,6 +141,32 @@ class IOCReader():
         return status
 
 
+    @contextlib.contextmanager
+    def open_input(self):
+        '''
+        Open the input file for binary reading, decompressing gzip, 
+        bzip2 or xz data on the fly based on the file magic bytes
+
+        Yields:
+            Buffered binary file object
+        '''
+        with open(self.filename, mode='rb', buffering=READ_BUFFER) as raw:
+            magic = raw.peek(6)[:6]
+            module = None
+            for signature, m in COMPRESSION.items():
+                if magic.startswith(signature):
+                    module = m
+                    break
+            if module:
+                self.compression = module.__name__
+                log.info(f'Decompressing {self.compression} input')
+                with module.open(raw) as stream:
+                    yield stream
+            else:
+                self.compression = ''
+                yield raw
+
+
     def normalise_json(self, data:dict) -> list:
         '''
         Take json data and return the list of IOCs
@@ -192,6 +242,9 @@ class TDIMPORT():
     '''
     Create a Simple CSV, NIOS RPZ CSV or Custom List in Threat Defense
 
+    Outputs share the parsed IOC data so any combination can be run
+    from a single read of the source file using run_outputs()
+
     TODO: TIDE Import
     '''
 
@@ -212,6 +265,9 @@ class TDIMPORT():
         '''
         self.iocs:list = ioc_data
         self.custom_list:str = custom_list
+        self.base_name:str = custom_list
+        self.custom_lists:list = []
+        self.failed_lists:list = []
         self.policy:str = policy
         self.data_profile:str = data_profile
         
@@ -338,9 +394,30 @@ class TDIMPORT():
         if failed_lists:
             log.error(f'Failed to create {len(failed_lists)}')
         
+        self.custom_lists = custom_lists
+        self.failed_lists = failed_lists
+
         return custom_lists
 
 
+    def import_custom_lists(self):
+        '''
+        Create custom lists and add to security policy if set
+
+        Returns:
+            status (bool): True if all lists created and policy updated
+        '''
+        status = False
+        custom_lists = self.to_custom_lists()
+        if custom_lists and not self.failed_lists:
+            status = True
+        if custom_lists and self.policy:
+            if not self.apply_custom_list():
+                status = False
+
+        return status
+
+
     def create_list(self, custom_list='', item_list=[]):
         '''
         Create custom list
@@ -395,7 +472,7 @@ class TDIMPORT():
                                                 "data": custom_list,
                                                 "type": "custom_list" })
                 # Update security policy
-                log.info(f'Updating policy: {policy} with id {policy_id}')
+                log.info(f'Updating policy: {self.policy} with id {policy_id}')
                 response = self.b1.put('/security_policies', 
                                     id=policy_id,
                                     body=json.dumps(policy_data))
@@ -424,7 +501,10 @@ class TDIMPORT():
         Output IP list as CSV
 
         Parameters:
-            outfile (obj): filehandler
+            filename (str): Output file, stdout if not set
+
+        Returns:
+            status (bool): False if output file could not be opened
         '''
         csvrow = ""
         csvheader = ""
@@ -432,6 +512,9 @@ class TDIMPORT():
 
         if filename:
             outfile = self.open_file(filename=filename)
+            if not outfile:
+                log.error(f'Failed to open output file for CSV: {filename}')
+                return False
         else:
             outfile = None
 
@@ -469,8 +552,11 @@ class TDIMPORT():
                 print(csvrow, file=outfile)
             else:
                 print(csvrow)
+
+        if outfile:
+            outfile.close()
                 
-        return
+        return True
 
 
     def output_nios_csv(self, 
@@ -482,11 +568,17 @@ class TDIMPORT():
 
         Parameters:
             zone (str): rpz zone name
-            rpz_parent (str): RPZ parent zone
+            view (str): NIOS DNS view
+            filename (str): Output file, stdout if not set
 
+        Returns:
+            status (bool): False if output file could not be opened
         '''
         if filename:
             outfile = self.open_file(filename=filename)
+            if not outfile:
+                log.error(f'Failed to open output file for NIOS CSV: {filename}')
+                return False
         else:
             outfile = None
 
@@ -518,7 +610,48 @@ class TDIMPORT():
             else:
                 print(line)
 
-        return
+        if outfile:
+            outfile.close()
+
+        return True
+
+
+    def run_outputs(self, outputs:list):
+        '''
+        Run output methods concurrently against the parsed IOC data
+
+        Parameters:
+            outputs (list): List of (name, method, kwargs) tuples,
+                            method returns True on success
+        
+        Returns:
+            results (dict): True if output succeeded, keyed on name
+        '''
+        results:dict = {}
+
+        if not outputs:
+            log.warning('No outputs specified')
+            return results
+
+        log.info(f'Running {len(outputs)} outputs')
+        with concurrent.futures.ThreadPoolExecutor(
+                max_workers=len(outputs)) as executor:
+            futures = { executor.submit(method, **kwargs): name
+                        for name, method, kwargs in outputs }
+            for future in concurrent.futures.as_completed(futures):
+                name = futures[future]
+                try:
+                    if future.result():
+                        log.info(f'Completed output: {name}')
+                        results[name] = True
+                    else:
+                        log.error(f'Output {name} failed')
+                        results[name] = False
+                except Exception as err:
+                    log.error(f'Output {name} failed: {err}')
+                    results[name] = False
+
+        return results
 
 
     def open_file(self, filename):
@@ -573,7 +706,8 @@ def parseargs():
         Returns parsed arguments
     '''
     parse = argparse.ArgumentParser(description='B1TD IOC Data Import')
-    exclusive = parse.add_mutually_exclusive_group(required=True)
+    outputs = parse.add_argument_group('outputs',
+                       'One or more outputs, generated from a single read')
     parse.add_argument('-i', '--input', type=str,
                        help="Input file <filename>", default="")
     parse.add_argument('-o', '--output', type=str,
@@ -590,12 +724,14 @@ def parseargs():
                        help="Name of security policy to add custom lists")
     parse.add_argument('-d', '--debug', action='store_true',
                        help="Enable debug messages")
-    exclusive.add_argument('-l', '--custom_list', type=str,
+    outputs.add_argument('-l', '--custom_list', type=str,
                        help="Base name for custom lists in BloxOne TD")
-    exclusive.add_argument('-n', '--nios_csv', action='store_true',
-                       help="Export NIOS RPZ CSV")
-    exclusive.add_argument('-C', '--csv', action='store_true',
-                       help="Export simple CSV")
+    outputs.add_argument('-n', '--nios_csv', type=str, nargs='?', const='',
+                       metavar='FILENAME',
+                       help="Export NIOS RPZ CSV [to <filename>]")
+    outputs.add_argument('-C', '--csv', type=str, nargs='?', const='',
+                       metavar='FILENAME',
+                       help="Export simple CSV [to <filename>]")
 
     return parse.parse_args()
 
@@ -637,18 +773,29 @@ def main():
     # Set up logging
     setup_logging(args.debug)
 
+    # Resolve file outputs, default to --output or stdout
+    files:dict = {}
+    if args.csv is not None:
+        files.update({ 'csv': args.csv or args.output })
+    if args.nios_csv is not None:
+        files.update({ 'nios_csv': args.nios_csv or args.output })
+
+    if not args.custom_list and not files:
+        log.error(f"No output specified try --help")
+        return 1
+    elif len(set(files.values())) < len(files):
+        log.error(f"Multiple CSV outputs require separate filenames")
+        return 1
+    elif args.custom_list and not args.config:
+        log.error(f"--custom_list requires --config")
+        return 1
+
     I = IOCReader(filename=args.input,
                   datafield=args.datafield,
                   iocfield=args.iocfield)
-
-    # Set up output file
-    if args.output:
-        outfile = open_file(args.output)
-        if not outfile:
-            log.error('Failed to open output file for CSV.')
-    else:
-        outfile = False
-
+    if not I.iocs:
+        log.error(f'No IOC data read from {args.input}')
+        return 1
 
     TDI = TDIMPORT(ioc_data=I.iocs,
                    custom_list=args.custom_list,
@@ -656,19 +803,20 @@ def main():
                    config=args.config)
     
     # Output selection
+    outputs:list = []
     if args.custom_list:
-        TDI.to_custom_lists()
-        if args.policy:
-            TDI.apply_custom_list()
-    elif args.csv:
-        TDI.output_csv(filename=args.output)
-    elif args.nios_csv:
-        TDI.output_nios_csv(filename=args.output)
-    else:
-        log.error(f"Incompatible options specified try --help")
+        outputs.append(('custom_list', TDI.import_custom_lists, {}))
+    if 'csv' in files.keys():
+        outputs.append(('csv', TDI.output_csv, 
+                        { 'filename': files.get('csv') }))
+    if 'nios_csv' in files.keys():
+        outputs.append(('nios_csv', TDI.output_nios_csv, 
+                        { 'filename': files.get('nios_csv') }))
+
+    results = TDI.run_outputs(outputs)
+    if not all(results.values()):
         exitcode = 1
 
-
     return exitcode
 
 
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
+"""
+------------------------------------------------------------------------
+
+ Description:
+
+ Benchmark IOCReader ingestion throughput for uncompressed, gzip,
+ bzip2 and xz compressed CSV and JSON input files.
+
+ Requirements:
+  Requires bloxone >= 0.8.10
+
+ Usage:
+    Use bench_ingest.py --help for details on options
+
+ Author: Chris Marrison
+
+ Date Last Updated: 20261019
+
+Copyright 2022 Chris Marrison / Infoblox
+
+Redistribution and use in source and binary forms,
+with or without modification, are permitted provided
+that the following conditions are met:
+
+1. Redistributions of source code must retain the above copyright
+notice, this list of conditions and the following disclaimer.
+
+2. Redistributions in binary form must reproduce the above copyright
+notice, this list of conditions and the following disclaimer in the
+documentation and/or other materials provided with the distribution.
+
+THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+"AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+POSSIBILITY OF SUCH DAMAGE.
+
+------------------------------------------------------------------------
+"""
+__version__ = '0.0.1'
+__author__ = 'Chris Marrison'
+__author_email__ = 'chris@infoblox.com'
+
+import os
+import sys
+import gzip
+import bz2
+import lzma
+import json
+import time
+import tempfile
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from b1td_ioc_import import IOCReader
+
+# ** Global Variables **
+COMPRESSION = { '': open,
+                '.gz': gzip.open,
+                '.bz2': bz2.open,
+                '.xz': lzma.open }
+
+# ** Functions **
+
+def parseargs():
+    '''
+    Parse Arguments Using argparse
+
+    Parameters:
+        None
+
+    Returns:
+        Returns parsed arguments
+    '''
+    parse = argparse.ArgumentParser(description='IOCReader ingest benchmark')
+    parse.add_argument('-r', '--rows', type=int, default=100000,
+                       help="Number of IOC rows to generate")
+    parse.add_argument('-n', '--repeat', type=int, default=3,
+                       help="Runs per file, best time is reported")
+    parse.add_argument('-f', '--format', choices=['csv', 'json'],
+                       nargs='+', default=['csv', 'json'],
+                       help="Input formats to benchmark")
+
+    return parse.parse_args()
+
+
+def generate_data(rows:int, fmt:str) -> str:
+    '''
+    Generate IOC test data
+
+    Parameters:
+        rows (int): Number of IOCs
+        fmt (str): csv or json
+
+    Returns:
+        data (str): IOC data in requested format
+    '''
+    iocs = [ (f'host{n}.example{n % 997}.com', n % 100)
+             for n in range(rows) ]
+    if fmt == 'json':
+        data = json.dumps({ 'iocs': [ { 'ioc': i, 'threat_level': t }
+                                      for i, t in iocs ] })
+    else:
+        data = 'ioc,threat_level\n'
+        data += ''.join([ f'{i},{t}\n' for i, t in iocs ])
+
+    return data
+
+
+def write_files(data:str, basename:str) -> list:
+    '''
+    Write data uncompressed and with each supported compression
+
+    Parameters:
+        data (str): File contents
+        basename (str): Path of uncompressed file
+
+    Returns:
+        files (list): List of filenames written
+    '''
+    files:list = []
+    for ext, opener in COMPRESSION.items():
+        filename = basename + ext
+        with opener(filename, 'wt') as f:
+            f.write(data)
+        files.append(filename)
+
+    return files
+
+
+def time_reader(filename:str, repeat:int) -> float:
+    '''
+    Time IOCReader ingestion of a file
+
+    Parameters:
+        filename (str): Input file
+        repeat (int): Number of runs
+
+    Returns:
+        best (float): Fastest run in seconds
+    '''
+    best = None
+    for n in range(repeat):
+        start = time.perf_counter()
+        IOCReader(filename=filename)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
+
+
+def main():
+    '''
+    * Main *
+
+    Core logic when running as script
+
+    '''
+    args = parseargs()
+
+    print(f'{"file":<20} {"size MB":>8} {"time s":>8} {"MB/s":>8}')
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for fmt in args.format:
+            data = generate_data(args.rows, fmt)
+            basename = os.path.join(tmpdir, f'iocs.{fmt}')
+            files = write_files(data, basename)
+            size = os.path.getsize(basename) / 1e6
+            for filename in files:
+                best = time_reader(filename, args.repeat)
+                print(f'{os.path.basename(filename):<20} ' +
+                      f'{os.path.getsize(filename) / 1e6:>8.2f} ' +
+                      f'{best:>8.3f} {size / best:>8.1f}')
+
+    return 0
+
+
+# ** Main **
+if __name__ == '__main__':
+    raise SystemExit(main())
+
+# ** End Main **